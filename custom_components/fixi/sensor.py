@@ -1,13 +1,20 @@
 import logging
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import homeassistant.helpers.config_validation as cv
 from datetime import timedelta
+from operator import itemgetter
 from homeassistant.components.sensor import PLATFORM_SCHEMA
 from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE, CONF_RADIUS, CONF_COUNT
 from homeassistant.helpers.entity import Entity
-from homeassistant.util import Throttle
 import voluptuous as vol
-import json
+
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -15,6 +22,66 @@ DOMAIN = 'fixi'
 
 MIN_TIME_BETWEEN_UPDATES = timedelta(minutes=30)
 
+# Failed updates are retried sooner than the update interval, but not on every poll
+RETRY_INTERVAL = timedelta(minutes=5)
+
+# Tokens are reused for slightly less than the update interval
+TOKEN_TTL = timedelta(minutes=25)
+
+# Seconds to wait for Fixi to connect or respond, token fetches hold a lock shared by all sensors
+REQUEST_TIMEOUT = 10
+
+# Sensors only do I/O in update(), let Home Assistant run them concurrently,
+# but no more than there are pooled connections to share
+PARALLEL_UPDATES = 10
+
+# Shared session, so all calls to Fixi reuse pooled keep-alive connections. Its default accept-encoding header is
+# kept, which already asks for compressed responses in every encoding the installed decoders support.
+_SESSION = requests.Session()
+_SESSION.headers.update({
+    "accept": "application/json, text/plain, */*",
+    "accept-language": "nl,en-US;q=0.9,en;q=0.8,de;q=0.7,und;q=0.6,fr;q=0.5",
+    "referrer": "https://www.fixi.nl/",
+})
+_SESSION.mount("https://", HTTPAdapter(
+    # Retry transient failures up to 3 times (4 attempts), but hand the last response back instead of raising, so it
+    # gets logged below. Retry-After is ignored, as a long one would stall the executor thread and the token lock.
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=('GET', 'POST'),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    ),
+    pool_connections=4,
+    pool_maxsize=PARALLEL_UPDATES,
+))
+
+# Issue fields exposed as sensor attributes, with their defaults
+_ATTR_FIELDS = (
+    ('address', ''),
+    ('addressDetails', ''),
+    ('description', ''),
+    ('created', ''),
+    ('closed', ''),
+    ('fetchDateTime', ''),
+    ('location', {}),
+    ('likeCount', 0),
+    ('hasComments', False),
+    ('visibility', ''),
+)
+
+# Fields a sensor needs that the nearby issues list might not include
+_DETAIL_FIELDS = frozenset(('modified', 'attachments'))
+
+# Token name -> (value, monotonic expiry time)
+_TOKEN_CACHE = {}
+_TOKEN_LOCK = threading.RLock()
+
+# (forgery token, access token) -> headers
+_HEADERS_CACHE = {}
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend({
     vol.Required(CONF_LATITUDE): cv.string,
     vol.Required(CONF_LONGITUDE): cv.string,
@@ -33,86 +100,133 @@ def setup_platform(hass, config, add_entities, discovery_info=None):
     fetcher = FixiDataFetcher(latitude, longitude, radius, count)
     fetcher.update()
 
-    current_sensors = {sensor.unique_id: sensor for sensor in hass.data.get(DOMAIN, {}).get('sensors', [])}
+    current_sensors = hass.data.setdefault(DOMAIN, {}).setdefault('sensors_by_id', {})
 
+    active_ids = set()
     new_sensors = []
     for issue in fetcher.issues:
-        issue_id = f"{DOMAIN}_{issue.get('publicID')}"
+        public_id = issue.get('publicID')
+        active_ids.add(public_id)
+        issue_id = f"{DOMAIN}_{public_id}"
         if issue_id not in current_sensors:
-            new_sensor = FixiSensor(issue)
+            new_sensor = FixiSensor(issue, fetcher)
             new_sensors.append(new_sensor)
             current_sensors[issue_id] = new_sensor
 
-    to_remove = [
-        sensor for sensor in current_sensors.values()
-        if sensor.public_id not in [issue.get('publicID') for issue in fetcher.issues]
-    ]
+    to_remove = [sensor for sensor in current_sensors.values() if sensor.public_id not in active_ids]
     for sensor in to_remove:
         _LOGGER.debug(f"Removing sensor: {sensor.unique_id}")
-        hass.data[DOMAIN]['sensors'].remove(sensor)
+        del current_sensors[sensor.unique_id]
 
     add_entities(new_sensors, True)
 
-    hass.data[DOMAIN] = {
-        'sensors': list(current_sensors.values())
-    }
-
 
 class FixiDataFetcher:
     """Class to fetch data from Fixi API."""
 
     def __init__(self, latitude, longitude, radius, count):
-        self._latitude = latitude
-        self._longitude = longitude
-        self._radius = radius
-        self._count = count
-        self.issues = []
-
-    @Throttle(MIN_TIME_BETWEEN_UPDATES)
-    def update(self):
-        """Fetch the latest data from Fixi API."""
-        url = (
-            f"https://www.fixi.nl/api/issues/nearbylite?latitude={self._latitude}"
-            f"&longitude={self._longitude}&radius={self._radius}"
-            f"&sortOrder=newestFirst&page=1&count={self._count}&doNotIntercept=true"
+        self._url = (
+            f"https://www.fixi.nl/api/issues/nearbylite?latitude={latitude}"
+            f"&longitude={longitude}&radius={radius}"
+            f"&sortOrder=newestFirst&page=1&count={count}&doNotIntercept=true"
         )
+        self._issues_by_id = {}
+        self._lock = threading.Lock()
+        self._last_attempt = None
+        self._up_to_date = False
 
-        response = requests.get(url=url, headers=get_headers())
+    def update(self):
+        """Fetch the latest data from Fixi API, at most once per update interval.
+
+        Sensors share the fetcher and update in parallel, so callers wait for a fetch in progress and then share its
+        result. Returns whether the issues were fetched successfully within the current interval.
+        """
+        with self._lock:
+            now = time.monotonic()
+            interval = MIN_TIME_BETWEEN_UPDATES if self._up_to_date else RETRY_INTERVAL
+            if self._last_attempt is None or now - self._last_attempt >= interval.total_seconds():
+                self._last_attempt = now
+                self._up_to_date = False  # Stays so when the fetch raises
+                self._up_to_date = self._fetch_issues()
+            return self._up_to_date
+
+    def _fetch_issues(self):
+        """Fetch the nearby issues from Fixi API, return whether this succeeded."""
+        response = authorized_get(self._url)
+        if response is None:
+            return False
         if response.status_code == 200:
             try:
-                data = json.loads(response.json())  # Double parse JSON, as Fixi requires it
+                data = parse_response(response)
                 _LOGGER.debug("Latest issues fetched successfully")
-                self.issues = data.get('results', [])
+                self._issues_by_id = {issue.get('publicID'): issue for issue in data.get('results', [])}
+                return True
             except ValueError as e:
                 _LOGGER.error("Error parsing JSON response: %s", e)
         else:
             _LOGGER.error("Error fetching data from Fixi API (%s): %s", response.status_code, response.text)
+        return False
+
+    @property
+    def issues(self):
+        """Return a view of the latest fetched issues."""
+        return self._issues_by_id.values()
+
+    def get_issue(self, public_id):
+        """Return the latest fetched data of an issue, if it was part of the results."""
+        return self._issues_by_id.get(public_id)
 
 
 class FixiSensor(Entity):
     """Representation of a Fixi sensor."""
 
-    def __init__(self, issue):
+    def __init__(self, issue, fetcher):
         """Initialize the sensor."""
-        self._issue = issue
+        self._fetcher = fetcher
         self._public_id = issue.get('publicID')
+        self._url = f"https://www.fixi.nl/api/issues/lite/{self._public_id}"
+        self._category_name = issue.get('categoryName', 'unknown')
+        self._status = issue.get('status', 'unknown')
         self._attributes = self._initialize_attributes(issue)
+        self._last_update = None
+        self._last_attempt = None
 
-    @Throttle(MIN_TIME_BETWEEN_UPDATES)
     def update(self):
         """Fetch new state data for the sensor."""
-        url = f"https://www.fixi.nl/api/issues/lite/{self._public_id}"
-        response = requests.get(url, headers=get_headers())
+        now = time.monotonic()
+        if self._last_update is not None and now - self._last_update < MIN_TIME_BETWEEN_UPDATES.total_seconds():
+            return
+        if self._last_attempt is not None and now - self._last_attempt < RETRY_INTERVAL.total_seconds():
+            return
+        self._last_attempt = now
+
+        data = self._fetcher.get_issue(self._public_id) if self._fetcher.update() else None
+        if data is None or not _DETAIL_FIELDS.issubset(data):
+            data = self._fetch_issue()
+            if data is None:
+                return
+
+        self._category_name = data.get('categoryName', self._category_name)
+        self._status = data.get('status', self._status)
+        attachments = data.get('attachments')
+        self._attributes = self._initialize_attributes(data)
+        self._attributes.update(
+            modified=data.get('modified', ''),
+            attachments=list(map(itemgetter('uri'), attachments)) if attachments else [],
+        )
+        self._last_update = now  # Only once fresh data was applied, so failures are retried after RETRY_INTERVAL
+
+    def _fetch_issue(self):
+        """Fetch the details of this issue from Fixi API."""
+        response = authorized_get(self._url)
+        if response is None:
+            return None
 
         if response.status_code == 200:
             try:
-                data = json.loads(response.json())  # Double parse JSON, as Fixi requires it
+                data = parse_response(response)
                 _LOGGER.debug("Issue data fetched successfully")
-                self._attributes = self._initialize_attributes(data)
-                self._attributes.update({
-                    'modified': data.get('modified', ''),
-                    'attachments': [attachment['uri'] for attachment in data.get('attachments', [])]
-                })
+                return data
             except ValueError as e:
                 _LOGGER.error("Error parsing JSON response: %s", e)
         else:
@@ -120,28 +234,18 @@ class FixiSensor(Entity):
 
     def _initialize_attributes(self, issue_data):
         """Initialize sensor attributes."""
-        return {
-            'address': issue_data.get('address', ''),
-            'addressDetails': issue_data.get('addressDetails', ''),
-            'description': issue_data.get('description', ''),
-            'created': issue_data.get('created', ''),
-            'closed': issue_data.get('closed', ''),
-            'fetchDateTime': issue_data.get('fetchDateTime', ''),
-            'location': issue_data.get('location', {}),
-            'likeCount': issue_data.get('likeCount', 0),
-            'hasComments': issue_data.get('hasComments', False),
-            'visibility': issue_data.get('visibility', ''),
-        }
+        get = issue_data.get
+        return {field: get(field, default) for field, default in _ATTR_FIELDS}
 
     @property
     def name(self):
         """Return the name of the sensor."""
-        return f"{self._public_id} - {self._issue.get('categoryName', 'unknown')}"
+        return f"{self._public_id} - {self._category_name}"
 
     @property
     def state(self):
         """Return the state of the sensor."""
-        return self._issue.get('status', 'unknown')
+        return self._status
 
     @property
     def unique_id(self) -> str:
@@ -161,16 +265,18 @@ class FixiSensor(Entity):
 
 def get_forgery_token():
     """Retrieve the anti-forgery token."""
-    response = requests.get("https://www.fixi.nl/api/utility/antiForgeryToken", headers={
-        "accept": "application/json, text/plain, */*",
-        "accept-language": "nl,en-US;q=0.9,en;q=0.8,de;q=0.7,und;q=0.6,fr;q=0.5",
+    response = _SESSION.get("https://www.fixi.nl/api/utility/antiForgeryToken", headers={
         "cache-control": "no-cache",
-        "referrer": "https://www.fixi.nl/",
-    })
+    }, timeout=REQUEST_TIMEOUT)
 
     if response.status_code == 200:
         try:
-            data = response.json()
+            data = _json.loads(response.content)
+            if isinstance(data, dict):  # Unwrap the token should it be returned as an object
+                data = data.get('token')
+            if not isinstance(data, str):
+                _LOGGER.error("Unexpected anti-forgery token response: %s", response.text)
+                return None
             _LOGGER.debug("'antiForgeryToken' data fetched successfully")
             return data
         except ValueError as e:
@@ -179,22 +285,19 @@ def get_forgery_token():
         _LOGGER.error("Error fetching anti-forgery token (%s): %s", response.status_code, response.text)
 
 
-def get_access_token():
+def get_access_token(forgery_token):
     """Retrieve the access token for authentication."""
     url = "https://www.fixi.nl/api/auth/getGrantTokens"
     headers = {
-        "accept": "application/json, text/plain, */*",
-        "accept-language": "nl,en-US;q=0.9,en;q=0.8,de;q=0.7,und;q=0.6,fr;q=0.5",
-        "antiforgerytoken": get_forgery_token(),
+        "antiforgerytoken": forgery_token,
         "content-type": "application/json;charset=UTF-8",
-        "referrer": "https://www.fixi.nl/",
     }
     payload = "{\"SerializedObject\":\"grant_type=client_credentials&client_id=d%2BB1TdgkOEuirFhOYhw4guf0lPeQuT72tuKTIkkyJvI%3D&client_secret=c0DglPf3fBPDe%2FJRD2KLhPuO%2BnlRsPdjsTSD03U%2FhWg%3D\"}"
 
-    response = requests.post(url=url, headers=headers, data=payload)
+    response = _SESSION.post(url=url, headers=headers, data=payload, timeout=REQUEST_TIMEOUT)
     if response.status_code == 200:
         try:
-            data = json.loads(response.json())  # Double parse JSON, as Fixi requires it
+            data = parse_response(response)
             _LOGGER.debug("'getGrantTokens' data fetched successfully")
             return data.get('access_token', '')
         except ValueError as e:
@@ -203,13 +306,80 @@ def get_access_token():
         _LOGGER.error("Error fetching access token (%s): %s", response.status_code, response.text)
 
 
+def parse_response(response):
+    """Parse the JSON payload of a Fixi API response."""
+    data = _json.loads(response.content)
+    if isinstance(data, str):  # Fixi usually wraps the payload in a JSON string, which needs a second parse
+        data = _json.loads(data)
+    return data
+
+
+def get_cached_token(name, fetch, *args):
+    """Return a cached token, fetching a new one with fetch(*args) once it has expired."""
+    with _TOKEN_LOCK:
+        value, expires_at = _TOKEN_CACHE.get(name, (None, 0))
+        if time.monotonic() >= expires_at:
+            value = fetch(*args)
+            # Failed fetches are cached too, so an outage is not retried by every sensor until RETRY_INTERVAL passed
+            ttl = TOKEN_TTL if value else RETRY_INTERVAL
+            _TOKEN_CACHE[name] = (value, time.monotonic() + ttl.total_seconds())
+        return value
+
+
+def invalidate_tokens(rejected_headers):
+    """Drop the cached tokens if they are still the ones sent in the rejected headers.
+
+    Parallel sensors rejected with the same stale tokens would otherwise each drop the new tokens fetched by another.
+    """
+    with _TOKEN_LOCK:
+        forgery_token = _TOKEN_CACHE.get('forgery', (None, 0))[0]
+        access_token = _TOKEN_CACHE.get('access', (None, 0))[0]
+        if (rejected_headers["antiforgerytoken"] == forgery_token
+                and rejected_headers["authorization"] == f"Bearer {access_token}"):
+            _TOKEN_CACHE.clear()
+
+
+def authorized_get(url):
+    """Perform an authorized GET request, retrying once with new tokens when rejected.
+
+    Returns None without calling the API when no tokens could be retrieved.
+    """
+    headers = get_headers()
+    if headers is None:
+        _LOGGER.error("Not requesting %s, as no tokens could be retrieved", url)
+        return None
+
+    response = _SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 401:
+        _LOGGER.debug("Tokens rejected by Fixi API, fetching new ones")
+        invalidate_tokens(headers)
+        headers = get_headers()
+        if headers is None:
+            _LOGGER.error("Not requesting %s again, as no new tokens could be retrieved", url)
+            return None
+        response = _SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    return response
+
+
 def get_headers():
-    """Generate headers with authorization and anti-forgery token."""
-    return {
-        "accept": "application/json, text/plain, */*",
-        "accept-language": "nl,en-US;q=0.9,en;q=0.8,de;q=0.7,und;q=0.6,fr;q=0.5",
-        "antiforgerytoken": get_forgery_token(),
-        "authorization": f"Bearer {get_access_token()}",
-        "content-type": "application/json;charset=UTF-8",
-        "referrer": "https://www.fixi.nl/",
-    }
+    """Generate headers with authorization and anti-forgery token, or None when either token is unavailable.
+
+    The same dict is returned for as long as the tokens stay the same, so it must not be modified.
+    """
+    forgery_token = get_cached_token('forgery', get_forgery_token)
+    if not forgery_token:
+        return None
+    access_token = get_cached_token('access', get_access_token, forgery_token)
+    if not access_token:
+        return None
+    tokens = (forgery_token, access_token)
+    headers = _HEADERS_CACHE.get(tokens)
+    if headers is None:
+        headers = {
+            "antiforgerytoken": forgery_token,
+            "authorization": f"Bearer {access_token}",
+            "content-type": "application/json;charset=UTF-8",
+        }
+        _HEADERS_CACHE.clear()
+        _HEADERS_CACHE[tokens] = headers
+    return headers
@@ -0,0 +1,120 @@
+"""Tests for the Fixi sensor platform."""
+import threading
+
+import pytest
+
+pytest.importorskip("homeassistant")
+requests = pytest.importorskip("requests")
+
+from custom_components.fixi import sensor  # noqa: E402
+
+
+def _fetcher():
+    return sensor.FixiDataFetcher(50, 5, 1000, 50)
+
+
+def test_concurrent_fetcher_updates_wait_for_and_share_one_fetch(monkeypatch):
+    fetcher = _fetcher()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch_issues():
+        calls.append(None)
+        started.set()
+        release.wait(5)
+        fetcher._issues_by_id = {1: {'publicID': 1, 'status': 'new'}}
+        return True
+
+    monkeypatch.setattr(fetcher, '_fetch_issues', fetch_issues)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetcher.update())) for _ in range(5)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [True] * 5
+    assert fetcher.get_issue(1) == {'publicID': 1, 'status': 'new'}
+
+
+def test_fetcher_is_not_up_to_date_after_fetch_raises(monkeypatch):
+    fetcher = _fetcher()
+    monkeypatch.setattr(fetcher, '_fetch_issues', lambda: True)
+    assert fetcher.update() is True
+
+    def fetch_issues():
+        raise requests.ConnectionError()
+
+    monkeypatch.setattr(fetcher, '_fetch_issues', fetch_issues)
+    fetcher._last_attempt -= sensor.MIN_TIME_BETWEEN_UPDATES.total_seconds()
+    with pytest.raises(requests.ConnectionError):
+        fetcher.update()
+
+    assert fetcher.update() is False
+
+
+def test_sensor_retries_failed_update_after_retry_interval(monkeypatch):
+    fetcher = _fetcher()
+    monkeypatch.setattr(fetcher, '_fetch_issues', lambda: False)
+    fixi_sensor = sensor.FixiSensor({'publicID': 1, 'status': 'new'}, fetcher)
+    calls = []
+    monkeypatch.setattr(fixi_sensor, '_fetch_issue', lambda: calls.append(None))
+
+    fixi_sensor.update()
+    fixi_sensor.update()
+    assert len(calls) == 1
+
+    fixi_sensor._last_attempt -= sensor.RETRY_INTERVAL.total_seconds()
+    fixi_sensor.update()
+    assert len(calls) == 2
+    assert fixi_sensor.state == 'new'
+
+
+@pytest.fixture
+def tokens(monkeypatch):
+    """Start with empty token caches and serve numbered tokens on each fetch."""
+    monkeypatch.setattr(sensor, '_TOKEN_CACHE', {})
+    monkeypatch.setattr(sensor, '_HEADERS_CACHE', {})
+    fetches = []
+
+    def get_forgery_token():
+        fetches.append('forgery')
+        return f"forgery-{fetches.count('forgery')}"
+
+    def get_access_token(forgery_token):
+        fetches.append('access')
+        return f"access-{fetches.count('access')}"
+
+    monkeypatch.setattr(sensor, 'get_forgery_token', get_forgery_token)
+    monkeypatch.setattr(sensor, 'get_access_token', get_access_token)
+    return fetches
+
+
+def test_invalidate_tokens_keeps_tokens_newer_than_the_rejected_ones(tokens):
+    rejected = sensor.get_headers()
+    sensor.invalidate_tokens(rejected)
+    current = sensor.get_headers()
+    assert current["authorization"] == "Bearer access-2"
+
+    sensor.invalidate_tokens(rejected)  # A second sensor rejected with the same stale tokens
+
+    assert sensor.get_headers() is current
+    assert len(tokens) == 4
+
+
+def test_authorized_get_does_not_call_api_without_tokens(tokens, monkeypatch):
+    monkeypatch.setattr(sensor, 'get_forgery_token', lambda: tokens.append('forgery'))
+    requested = []
+    monkeypatch.setattr(sensor._SESSION, 'get', lambda *args, **kwargs: requested.append(args))
+
+    assert sensor.authorized_get("https://www.fixi.nl/api/issues/lite/1") is None
+    assert sensor.authorized_get("https://www.fixi.nl/api/issues/lite/1") is None
+
+    assert tokens == ['forgery']  # No access token fetch, and the failure is cached for RETRY_INTERVAL
+    assert requested == []